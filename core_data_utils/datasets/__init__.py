@@ -1 +1,2 @@
 from .base_dataset import BaseDataSet, BaseDataSetEntry
+from .memory import MemoryBudget, SpillableEntryStore
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import os
 import pickle
-from collections.abc import Hashable
+from collections.abc import Hashable, Mapping, MutableMapping
 from copy import deepcopy
 from typing import Any, Optional
 
+from .memory import MemoryBudget, SpillableEntryStore
+
 
 class BaseDataSetEntry:
 
@@ -53,29 +55,47 @@ class BaseDataSet:
         ds_metadata (dict): Dataset-level metadata.
         data (dict): Data to store in the dataset.
         data_metadata (dict): dataset entry-level metadata.
+        memory_budget (MemoryBudget, optional): Memory budget governing the
+            dataset entries. Entries exceeding the budget are spilled to disk
+            and loaded back transparently on access. Defaults to the budget of
+            'dataset_entries' if those are held by a 'SpillableEntryStore'.
     """
 
     def __init__(
         self,
         ds_metadata: Optional[dict[str, Any]] = None,
         dataset_entries: Optional[
-            list[BaseDataSetEntry] | dict[Hashable, BaseDataSetEntry]
+            list[BaseDataSetEntry] | Mapping[Hashable, BaseDataSetEntry]
         ] = None,
+        memory_budget: Optional[MemoryBudget] = None,
     ) -> None:
 
+        if memory_budget is None and isinstance(dataset_entries, SpillableEntryStore):
+            memory_budget = dataset_entries.memory_budget
+
         # initialize to empty dataset
         self._metadata: dict[str, Any] = (
             deepcopy(ds_metadata) if ds_metadata is not None else {}
         )
+        self._memory_budget: Optional[MemoryBudget] = memory_budget
         self._data_identifiers: list[Hashable] = []
-        self._data: dict[Hashable, BaseDataSetEntry] = {}
+        self._data: MutableMapping[Hashable, BaseDataSetEntry] = (
+            {} if memory_budget is None else SpillableEntryStore(memory_budget)
+        )
 
         if dataset_entries is not None:
             if isinstance(dataset_entries, list):
                 for entry in dataset_entries:
                     self._data[entry.identifier] = entry
 
-            elif isinstance(dataset_entries, dict):
+            elif (
+                isinstance(dataset_entries, SpillableEntryStore)
+                and dataset_entries.memory_budget is memory_budget
+            ):
+                # adopt store directly so spilled entries are not loaded
+                self._data = dataset_entries
+
+            elif isinstance(dataset_entries, Mapping):
                 for identifier, entry in dataset_entries.items():
                     assert identifier == entry.identifier
                     self._data[identifier] = entry
@@ -123,7 +143,9 @@ class BaseDataSet:
                 cidx += step
 
             return BaseDataSet(
-                ds_metadata=self._metadata, dataset_entries=entries_to_return
+                ds_metadata=self._metadata,
+                dataset_entries=entries_to_return,
+                memory_budget=self._memory_budget,
             )
 
         raise ValueError(
@@ -150,6 +172,17 @@ class BaseDataSet:
         """
         return self._metadata
 
+    @property
+    def memory_budget(self) -> Optional[MemoryBudget]:
+        """
+        Return the memory budget governing the dataset entries.
+
+        Returns:
+            (MemoryBudget | None): memory budget, 'None' if entries are
+                always kept in memory.
+        """
+        return self._memory_budget
+
     def to_dict(self) -> dict:
         """
         Return dataset in form of a nested dictionary.
@@ -165,17 +198,26 @@ class BaseDataSet:
 
     @classmethod
     def from_flat_dicts(
-        cls, data_dict: dict[Hashable, Any], metadata: Optional[dict] = None
+        cls,
+        data_dict: dict[Hashable, Any],
+        metadata: Optional[dict] = None,
+        memory_budget: Optional[MemoryBudget] = None,
     ) -> BaseDataSet:
         ds_entries: list[BaseDataSetEntry] = [
             BaseDataSetEntry(identifier=k, data=v, metadata={})
             for k, v in data_dict.items()
         ]
-        return cls(ds_metadata=metadata, dataset_entries=ds_entries)
+        return cls(
+            ds_metadata=metadata,
+            dataset_entries=ds_entries,
+            memory_budget=memory_budget,
+        )
 
     def to_pickle(self, fpath: str, mkdir: bool = False) -> None:
         """
         Save instance data by serializing data dictionary to a pickle file.
+        Entries of datasets with a memory budget are streamed to the file one
+        by one instead of serializing a single dictionary.
         Args:
             fpath (str): File path of pickle file to which data dictionary
                 should be serialized.
@@ -184,24 +226,46 @@ class BaseDataSet:
             os.makedirs(os.path.dirname(fpath), exist_ok=True)
 
         with open(fpath, "wb") as save_file:
-            pickle.dump(self.to_dict(), save_file)
+            if isinstance(self._data, SpillableEntryStore):
+                pickle.dump(
+                    {"metadata": self._metadata, "num_entries": len(self._data)},
+                    save_file,
+                )
+                self._data.dump_entries(save_file)
+            else:
+                pickle.dump(self.to_dict(), save_file)
 
     @classmethod
-    def from_pickle(cls, fpath: str) -> BaseDataSet:
+    def from_pickle(
+        cls, fpath: str, memory_budget: Optional[MemoryBudget] = None
+    ) -> BaseDataSet:
         """
         Load data into new instance of 'BaseDataSet'.
         Args:
             fpath (str): File path of pickle file to which data dictionary
                 was serialzed.
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the loaded dataset entries.
         Returns:
             (BaseDataSet): New 'BaseDataSet' instance containing loaded data.
         """
         with open(fpath, "rb") as read_file:
             ds_dict = pickle.load(read_file)
 
+            if "data" not in ds_dict:
+                # entries were streamed one by one after the header
+                data: MutableMapping[Hashable, BaseDataSetEntry] = (
+                    {} if memory_budget is None else SpillableEntryStore(memory_budget)
+                )
+                for _ in range(ds_dict["num_entries"]):
+                    entry = pickle.load(read_file)
+                    data[entry.identifier] = entry
+                ds_dict["data"] = data
+
         return cls(
             ds_metadata=ds_dict["metadata"],
             dataset_entries=ds_dict["data"],
+            memory_budget=memory_budget,
         )
 
     def __repr__(self) -> str:
@@ -222,17 +286,33 @@ class BaseDataSet:
                 )
         return reprstr
 
-    def copy(self) -> BaseDataSet:
+    def copy(self, memory_budget: Optional[MemoryBudget] = None) -> BaseDataSet:
         """
         Create a (deep) copy of the dataset
+        Args:
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the copy. Defaults to the budget of the dataset. If a different
+                budget is supplied, entries are copied into it one by one.
         Returns:
             (BaseDataSet): a fully independent copy of the dataset.
         """
-        independent_ds_dict = deepcopy(self.to_dict())
+        if memory_budget is None or memory_budget is self._memory_budget:
+            independent_ds_dict = deepcopy(self.to_dict())
+
+            return BaseDataSet(
+                ds_metadata=independent_ds_dict["metadata"],
+                dataset_entries=independent_ds_dict["data"],
+                memory_budget=self._memory_budget,
+            )
+
+        new_data = SpillableEntryStore(memory_budget)
+        for identifier in self._data_identifiers:
+            new_data[identifier] = deepcopy(self._data[identifier])
 
         return BaseDataSet(
-            ds_metadata=independent_ds_dict["metadata"],
-            dataset_entries=independent_ds_dict["data"],
+            ds_metadata=self._metadata,
+            dataset_entries=new_data,
+            memory_budget=memory_budget,
         )
 
     def get_with_identifier(self, identifier: Hashable) -> BaseDataSetEntry:
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import functools
 import os
+import threading
+from collections.abc import Hashable, MutableMapping
+from typing import Any, Optional
 
 try:
     import cv2
@@ -10,6 +14,164 @@ except ModuleNotFoundError as mnferr:
     ) from mnferr
 
 from .base_dataset import BaseDataSet, BaseDataSetEntry
+from .memory import MemoryBudget, SpillableEntryStore
+
+# largest forward gap between frames that is skipped by grabbing frames
+# instead of seeking
+_MAX_GRAB_GAP: int = 32
+
+
+class _VideoReader:
+    """
+    Keeps a 'cv2.VideoCapture' open and only seeks when frames are not
+    requested in (strided) sequential order. Access to the capture is
+    serialized, so entries can be decoded from several threads.
+    """
+
+    def __init__(self, fpath: str) -> None:
+        self._capture = cv2.VideoCapture(fpath)
+        if not self._capture.isOpened():
+            raise ValueError(f"Could not open video file '{fpath}'.")
+        self._fpath = fpath
+        self._position: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def fps(self) -> float:
+        with self._lock:
+            return self._capture.get(cv2.CAP_PROP_FPS)
+
+    def count_frames(self) -> int:
+        with self._lock:
+            return self._count_frames()
+
+    def _count_frames(self) -> int:
+        frame_count = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 0:
+            return frame_count
+
+        # container does not report a frame count, count by grabbing frames
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        frame_count = 0
+        while self._capture.grab():
+            frame_count += 1
+        self._position = frame_count
+        return frame_count
+
+    def _read_failed(self, frame_index: int) -> RuntimeError:
+        # position is unknown after a failed read, seek on next access
+        self._position = -1
+        return RuntimeError(
+            f"Could not read frame '{frame_index}' from '{self._fpath}'."
+        )
+
+    def read(self, frame_index: int) -> Any:
+        with self._lock:
+            return self._read(frame_index)
+
+    def _read(self, frame_index: int) -> Any:
+        gap = frame_index - self._position
+
+        if self._position >= 0 and 0 < gap <= _MAX_GRAB_GAP:
+            # grabbing small gaps is cheaper than seeking and frame-accurate,
+            # while seeking is only keyframe-accurate for many codecs
+            while self._position < frame_index:
+                if not self._capture.grab():
+                    raise self._read_failed(frame_index)
+                self._position += 1
+
+        elif gap != 0:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+        success, frame = self._capture.read()
+        if not success:
+            raise self._read_failed(frame_index)
+
+        self._position = frame_index + 1
+        return frame
+
+
+@functools.lru_cache(maxsize=8)
+def _open_video_reader(fpath: str, mtime_ns: int, size: int) -> _VideoReader:
+    return _VideoReader(fpath)
+
+
+def _get_video_reader(fpath: str) -> _VideoReader:
+    # readers are cached per file version, so rewritten files are reopened
+    fstat = os.stat(fpath)
+    return _open_video_reader(fpath, fstat.st_mtime_ns, fstat.st_size)
+
+
+def _frame_indices(
+    start: int, stop: Optional[int], step: int, frame_count: int
+) -> range:
+    if step < 1:
+        raise ValueError(f"'step' has to be a positive integer >=1, got '{step}'")
+    if start < 0:
+        raise ValueError(f"'start' has to be a non-negative integer, got '{start}'")
+
+    stop = frame_count if stop is None else min(stop, frame_count)
+
+    if start >= stop:
+        raise ValueError(
+            f"'start' has to be strictly less than 'stop', got start='{start}', stop='{stop}'"
+        )
+
+    return range(start, stop, step)
+
+
+class VideoFrameEntry(BaseDataSetEntry):
+    """
+    Dataset entry that decodes a single frame of a video file on access.
+    Decoded frames are not cached.
+    """
+
+    def __init__(
+        self,
+        identifier: Hashable,
+        fpath: str,
+        frame_index: int,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        super().__init__(identifier=identifier, data=None, metadata=metadata)
+        self._fpath = fpath
+        self._frame_index = frame_index
+
+    @property
+    def data(self) -> Any:
+        return cv2.cvtColor(
+            _get_video_reader(self._fpath).read(self._frame_index),
+            cv2.COLOR_BGR2RGB,
+        )
+
+
+class StackPageEntry(BaseDataSetEntry):
+    """
+    Dataset entry that decodes a single page of a multi-page image file
+    (e.g. a TIFF stack) on access. Decoded pages are not cached.
+    """
+
+    def __init__(
+        self,
+        identifier: Hashable,
+        fpath: str,
+        page_index: int,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        super().__init__(identifier=identifier, data=None, metadata=metadata)
+        self._fpath = fpath
+        self._page_index = page_index
+
+    @property
+    def data(self) -> Any:
+        success, pages = cv2.imreadmulti(
+            self._fpath, self._page_index, 1, flags=cv2.IMREAD_COLOR
+        )
+        if not success or len(pages) != 1:
+            raise RuntimeError(
+                f"Could not read page '{self._page_index}' from '{self._fpath}'."
+            )
+        return cv2.cvtColor(pages[0], cv2.COLOR_BGR2RGB)
 
 
 class ImageDataset(BaseDataSet):
@@ -18,12 +180,16 @@ class ImageDataset(BaseDataSet):
     def from_directory(
         cls,
         directory: str,
+        memory_budget: Optional[MemoryBudget] = None,
     ) -> ImageDataset:
 
         if not os.path.isdir(directory):
             raise ValueError(f"{directory} is not a valid directory path.")
 
-        data: dict = {}
+        # decoded images are spilled as they come in if a budget is supplied
+        data: MutableMapping = (
+            {} if memory_budget is None else SpillableEntryStore(memory_budget)
+        )
 
         filenames: list[str] = [
             f
@@ -41,4 +207,86 @@ class ImageDataset(BaseDataSet):
                 identifier=filename, data=image, metadata={}
             )
 
-        return cls(ds_metadata=None, dataset_entries=data)
+        return cls(ds_metadata=None, dataset_entries=data, memory_budget=memory_budget)
+
+    @classmethod
+    def from_video(
+        cls,
+        fpath: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+        memory_budget: Optional[MemoryBudget] = None,
+    ) -> ImageDataset:
+        """
+        Create dataset from the frames of a video file. Frames are identified
+        by their index and decoded lazily on access, sequential access does
+        not require seeking.
+
+        Args:
+            fpath (str): Path of video file.
+            start (int): Index of the first frame to include. Default is '0'.
+            stop (int, optional): Index of the frame at which to stop
+                (exclusive). Defaults to the number of frames in the video.
+            step (int): Stride between included frames. Default is '1'.
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the dataset entries.
+        Returns:
+            (ImageDataset): Dataset of lazily decoded video frames.
+        """
+        if not os.path.isfile(fpath):
+            raise ValueError(f"{fpath} is not a valid file path.")
+
+        reader = _get_video_reader(fpath)
+
+        entries: list[BaseDataSetEntry] = [
+            VideoFrameEntry(
+                identifier=frame_index, fpath=fpath, frame_index=frame_index
+            )
+            for frame_index in _frame_indices(start, stop, step, reader.count_frames())
+        ]
+
+        return cls(
+            ds_metadata={"source": fpath, "fps": reader.fps},
+            dataset_entries=entries,
+            memory_budget=memory_budget,
+        )
+
+    @classmethod
+    def from_multipage(
+        cls,
+        fpath: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+        memory_budget: Optional[MemoryBudget] = None,
+    ) -> ImageDataset:
+        """
+        Create dataset from the pages of a multi-page image file (e.g. a
+        TIFF stack). Pages are identified by their index and decoded lazily
+        on access.
+
+        Args:
+            fpath (str): Path of multi-page image file.
+            start (int): Index of the first page to include. Default is '0'.
+            stop (int, optional): Index of the page at which to stop
+                (exclusive). Defaults to the number of pages in the file.
+            step (int): Stride between included pages. Default is '1'.
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the dataset entries.
+        Returns:
+            (ImageDataset): Dataset of lazily decoded pages.
+        """
+        if not os.path.isfile(fpath):
+            raise ValueError(f"{fpath} is not a valid file path.")
+
+        entries: list[BaseDataSetEntry] = [
+            StackPageEntry(identifier=page_index, fpath=fpath, page_index=page_index)
+            for page_index in _frame_indices(start, stop, step, cv2.imcount(fpath))
+        ]
+
+        return cls(
+            ds_metadata={"source": fpath},
+            dataset_entries=entries,
+            memory_budget=memory_budget,
+        )
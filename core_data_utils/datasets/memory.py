@@ -0,0 +1,543 @@
+from __future__ import annotations
+
+import itertools
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable, Iterator, MutableMapping
+from copy import deepcopy
+from typing import Any, BinaryIO, Optional
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Approximate the number of bytes occupied by an object.
+
+    Objects exposing 'nbytes' (e.g. numpy arrays) report their buffer size,
+    containers and plain objects are traversed (iteratively, so deeply
+    nested objects are supported).
+
+    Args:
+        obj (Any): Object whose size should be estimated.
+    Returns:
+        (int): Approximate size of 'obj' in bytes.
+    """
+    size: int = 0
+    seen: set[int] = set()
+    stack: list[Any] = [obj]
+
+    while stack:
+        current = stack.pop()
+
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        nbytes = getattr(current, "nbytes", None)
+        if isinstance(nbytes, int):
+            size += nbytes
+            continue
+
+        size += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes, bytearray)):
+            continue
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+
+    return size
+
+
+class MemoryBudget:
+    """
+    Approximate memory budget that can be shared by datasets and transformations.
+
+    Dataset entries held by a budget are tracked in least-recently-used order.
+    Whenever the tracked entries together with the bytes reserved for
+    in-flight work exceed 'max_bytes', the coldest entries are spilled to
+    disk and read back transparently on their next access.
+
+    Args:
+        max_bytes (int): Maximum number of bytes that should be resident.
+        spill_directory (str, optional): Directory in which spilled entries
+            are stored. A temporary directory is created if not supplied.
+    """
+
+    def __init__(self, max_bytes: int, spill_directory: Optional[str] = None) -> None:
+        if max_bytes <= 0:
+            raise ValueError(
+                f"'max_bytes' has to be a positive integer, got '{max_bytes}'."
+            )
+
+        self._max_bytes: int = max_bytes
+        self._spill_directory: Optional[str] = spill_directory
+
+        self._stores: weakref.WeakValueDictionary[int, SpillableEntryStore] = (
+            weakref.WeakValueDictionary()
+        )
+        # maps (store id, identifier) to (size, object id) of resident entries
+        self._resident: OrderedDict[tuple[int, Hashable], tuple[int, int]] = (
+            OrderedDict()
+        )
+        # maps object ids of resident entries to the store owning them
+        self._owners: dict[int, tuple[int, Hashable]] = {}
+        self._resident_bytes: int = 0
+        self._reserved_bytes: int = 0
+
+    def __deepcopy__(self, memo: dict) -> MemoryBudget:
+        # the budget is shared accounting, copies of datasets stay within it
+        return self
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def resident_bytes(self) -> int:
+        """
+        Returns:
+            (int): Approximate number of bytes of resident dataset entries.
+        """
+        return self._resident_bytes
+
+    @property
+    def reserved_bytes(self) -> int:
+        """
+        Returns:
+            (int): Number of bytes currently reserved for in-flight work.
+        """
+        return self._reserved_bytes
+
+    @property
+    def used_bytes(self) -> int:
+        return self._resident_bytes + self._reserved_bytes
+
+    @property
+    def spill_directory(self) -> str:
+        if self._spill_directory is None:
+            self._spill_directory = tempfile.mkdtemp(prefix="core_data_utils_")
+            weakref.finalize(self, shutil.rmtree, self._spill_directory, True)
+        else:
+            os.makedirs(self._spill_directory, exist_ok=True)
+        return self._spill_directory
+
+    def can_reserve(self, nbytes: int) -> bool:
+        """
+        Check whether 'nbytes' can be reserved without exceeding the budget.
+        Resident entries are not taken into account, as they can be spilled.
+
+        Args:
+            nbytes (int): Number of bytes to reserve.
+        Returns:
+            (bool): Whether the reservation fits into the budget.
+        """
+        return self._reserved_bytes + nbytes <= self._max_bytes
+
+    def reserve(self, nbytes: int) -> None:
+        """
+        Reserve memory for in-flight work, spilling resident entries if necessary.
+
+        Args:
+            nbytes (int): Number of bytes to reserve.
+        """
+        self._reserved_bytes += nbytes
+        self._enforce()
+
+    def release(self, nbytes: int) -> None:
+        """
+        Release memory previously reserved with 'reserve'.
+
+        Args:
+            nbytes (int): Number of bytes to release.
+        """
+        self._reserved_bytes = max(0, self._reserved_bytes - nbytes)
+
+    def _register_store(self, store: SpillableEntryStore) -> None:
+        self._stores[id(store)] = store
+
+    def _forget_store(self, store_id: int) -> None:
+        for key in [k for k in self._resident if k[0] == store_id]:
+            self._pop_resident(key)
+
+    def _pop_resident(self, key: tuple[int, Hashable]) -> None:
+        nbytes, object_id = self._resident.pop(key)
+        self._resident_bytes -= nbytes
+        if self._owners.get(object_id) == key:
+            del self._owners[object_id]
+
+    def _owner_of(self, entry: Any) -> Optional[tuple[SpillableEntryStore, Hashable]]:
+        key = self._owners.get(id(entry))
+        if key is None:
+            return None
+
+        store = self._stores.get(key[0])
+        if store is None or store._resident.get(key[1]) is not entry:
+            return None
+        return store, key[1]
+
+    def _track(
+        self, store: SpillableEntryStore, identifier: Hashable, entry: Any
+    ) -> None:
+        key = (id(store), identifier)
+        self._untrack(store, identifier)
+
+        nbytes = estimate_size(entry)
+        self._resident[key] = (nbytes, id(entry))
+        self._owners[id(entry)] = key
+        self._resident_bytes += nbytes
+        self._enforce(protected=key)
+
+    def _touch(self, store: SpillableEntryStore, identifier: Hashable) -> None:
+        self._resident.move_to_end((id(store), identifier))
+
+    def _untrack(self, store: SpillableEntryStore, identifier: Hashable) -> None:
+        key = (id(store), identifier)
+        if key in self._resident:
+            self._pop_resident(key)
+
+    def _enforce(self, protected: Optional[tuple[int, Hashable]] = None) -> None:
+        while self.used_bytes > self._max_bytes and self._resident:
+            key = next(iter(self._resident))
+            if key == protected:
+                # only the entry that is currently being accessed is left
+                break
+
+            self._pop_resident(key)
+            store = self._stores.get(key[0])
+            if store is not None:
+                store._spill(key[1])
+
+    def __repr__(self) -> str:
+        return (
+            f"MemoryBudget(max_bytes={self._max_bytes}, "
+            f"resident_bytes={self._resident_bytes}, "
+            f"reserved_bytes={self._reserved_bytes})"
+        )
+
+
+def _hand_over_entry(
+    memory_budget: MemoryBudget,
+    owner: Optional[SpillableEntryStore],
+    owner_id: int,
+    resident: dict[Hashable, Any],
+    spilled: dict[Hashable, str],
+    alias_holders: dict[Hashable, list[tuple[weakref.ref, Hashable]]],
+    identifier: Hashable,
+) -> bool:
+    """
+    Transfer ownership of an entry that is about to be removed to the first
+    store still referring to it, the remaining stores refer to the new owner
+    afterwards. 'owner' is 'None' if the owning store is being finalized.
+
+    Returns:
+        (bool): Whether the entry was handed over.
+    """
+    holders = []
+    for holder_ref, holder_identifier in alias_holders.pop(identifier, []):
+        holder = holder_ref()
+        if holder is None:
+            continue
+        alias = holder._aliases.get(holder_identifier)
+        if alias is not None and alias[0]() is owner and alias[1] == identifier:
+            holders.append((holder, holder_identifier))
+
+    if not holders:
+        return False
+
+    new_owner, new_identifier = holders[0]
+    del new_owner._aliases[new_identifier]
+
+    if identifier in resident:
+        entry = resident.pop(identifier)
+        if (owner_id, identifier) in memory_budget._resident:
+            memory_budget._pop_resident((owner_id, identifier))
+        new_owner._resident[new_identifier] = entry
+        memory_budget._track(new_owner, new_identifier, entry)
+    else:
+        path = new_owner._new_spill_path()
+        shutil.move(spilled.pop(identifier), path)
+        new_owner._spilled[new_identifier] = path
+
+    for holder, holder_identifier in holders[1:]:
+        holder._add_alias(holder_identifier, new_owner, new_identifier)
+
+    return True
+
+
+def _release_store(
+    memory_budget: MemoryBudget,
+    store_id: int,
+    directory: str,
+    resident: dict[Hashable, Any],
+    spilled: dict[Hashable, str],
+    alias_holders: dict[Hashable, list[tuple[weakref.ref, Hashable]]],
+) -> None:
+    # entries still referred to by other stores (e.g. slices) outlive the store
+    for identifier in list(alias_holders):
+        _hand_over_entry(
+            memory_budget,
+            None,
+            store_id,
+            resident,
+            spilled,
+            alias_holders,
+            identifier,
+        )
+
+    memory_budget._forget_store(store_id)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class SpillableEntryStore(MutableMapping):
+    """
+    Mapping of identifiers to dataset entries whose memory usage is governed
+    by a 'MemoryBudget'. Entries that have been spilled to disk are loaded
+    back transparently when accessed.
+
+    Entries that are already held by another store of the same budget (e.g.
+    when slicing a dataset) are not tracked a second time. Instead, the store
+    (weakly) refers to the owning store, which takes care of spilling and
+    loading. Ownership is handed over when the owner removes the entry or is
+    garbage collected.
+
+    Args:
+        memory_budget (MemoryBudget): Budget the stored entries count towards.
+    """
+
+    def __init__(self, memory_budget: MemoryBudget) -> None:
+        self._memory_budget = memory_budget
+
+        # '_identifiers' keeps the insertion order and is never modified by
+        # spilling or loading, so it is safe to iterate while accessing entries
+        self._identifiers: dict[Hashable, None] = {}
+        self._resident: dict[Hashable, Any] = {}
+        self._spilled: dict[Hashable, str] = {}
+
+        # entries owned by other stores: identifier -> (owner, owner identifier)
+        self._aliases: dict[
+            Hashable, tuple[weakref.ref[SpillableEntryStore], Hashable]
+        ] = {}
+        # stores referring to entries of this store: identifier -> holders
+        self._alias_holders: dict[
+            Hashable, list[tuple[weakref.ref[SpillableEntryStore], Hashable]]
+        ] = {}
+
+        self._directory: str = tempfile.mkdtemp(dir=memory_budget.spill_directory)
+        self._file_counter = itertools.count()
+
+        memory_budget._register_store(self)
+        weakref.finalize(
+            self,
+            _release_store,
+            memory_budget,
+            id(self),
+            self._directory,
+            self._resident,
+            self._spilled,
+            self._alias_holders,
+        )
+
+    @property
+    def memory_budget(self) -> MemoryBudget:
+        return self._memory_budget
+
+    def _resolve_alias(
+        self, identifier: Hashable
+    ) -> tuple[SpillableEntryStore, Hashable]:
+        owner_ref, owner_identifier = self._aliases[identifier]
+        # owners hand over their entries before they are collected
+        return owner_ref(), owner_identifier
+
+    def is_spilled(self, identifier: Hashable) -> bool:
+        if identifier in self._aliases:
+            owner, owner_identifier = self._resolve_alias(identifier)
+            return owner.is_spilled(owner_identifier)
+        return identifier in self._spilled
+
+    def _new_spill_path(self) -> str:
+        return os.path.join(self._directory, f"{next(self._file_counter)}.pickle")
+
+    def _spill(self, identifier: Hashable) -> None:
+        entry = self._resident.pop(identifier)
+        path = self._new_spill_path()
+
+        with open(path, "wb") as spill_file:
+            pickle.dump(entry, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._spilled[identifier] = path
+
+    def _add_alias(
+        self,
+        identifier: Hashable,
+        owner: SpillableEntryStore,
+        owner_identifier: Hashable,
+    ) -> None:
+        self._aliases[identifier] = (weakref.ref(owner), owner_identifier)
+        owner._alias_holders.setdefault(owner_identifier, []).append(
+            (weakref.ref(self), identifier)
+        )
+
+    def _remove_alias(self, identifier: Hashable) -> None:
+        owner_ref, owner_identifier = self._aliases.pop(identifier)
+        owner = owner_ref()
+        if owner is None:
+            return
+
+        holders = [
+            (holder_ref, holder_identifier)
+            for holder_ref, holder_identifier in owner._alias_holders.get(
+                owner_identifier, []
+            )
+            if not (holder_ref() is self and holder_identifier == identifier)
+        ]
+        if holders:
+            owner._alias_holders[owner_identifier] = holders
+        else:
+            owner._alias_holders.pop(owner_identifier, None)
+
+    def _hand_over(self, identifier: Hashable) -> bool:
+        return _hand_over_entry(
+            self._memory_budget,
+            self,
+            id(self),
+            self._resident,
+            self._spilled,
+            self._alias_holders,
+            identifier,
+        )
+
+    def __getitem__(self, identifier: Hashable) -> Any:
+        if identifier in self._aliases:
+            owner, owner_identifier = self._resolve_alias(identifier)
+            return owner[owner_identifier]
+
+        if identifier in self._resident:
+            self._memory_budget._touch(self, identifier)
+            return self._resident[identifier]
+
+        if identifier not in self._spilled:
+            raise KeyError(identifier)
+
+        path = self._spilled.pop(identifier)
+        with open(path, "rb") as spill_file:
+            entry = pickle.load(spill_file)
+        os.remove(path)
+
+        self._resident[identifier] = entry
+        self._memory_budget._track(self, identifier, entry)
+        return entry
+
+    def __setitem__(self, identifier: Hashable, entry: Any) -> None:
+        if identifier in self._identifiers:
+            del self[identifier]
+
+        self._identifiers[identifier] = None
+
+        owner = self._memory_budget._owner_of(entry)
+        if owner is not None:
+            # entry is already accounted for by the budget
+            self._add_alias(identifier, *owner)
+        else:
+            self._resident[identifier] = entry
+            self._memory_budget._track(self, identifier, entry)
+
+    def __delitem__(self, identifier: Hashable) -> None:
+        del self._identifiers[identifier]
+
+        if identifier in self._aliases:
+            self._remove_alias(identifier)
+        elif self._hand_over(identifier):
+            pass
+        elif identifier in self._resident:
+            del self._resident[identifier]
+            self._memory_budget._untrack(self, identifier)
+        else:
+            os.remove(self._spilled.pop(identifier))
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._identifiers
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._identifiers)
+
+    def __len__(self) -> int:
+        return len(self._identifiers)
+
+    def _copy_entry_to(
+        self,
+        identifier: Hashable,
+        target: SpillableEntryStore,
+        target_identifier: Hashable,
+        memo: dict,
+    ) -> None:
+        if identifier in self._aliases:
+            owner, owner_identifier = self._resolve_alias(identifier)
+            owner._copy_entry_to(owner_identifier, target, target_identifier, memo)
+
+        elif identifier in self._spilled:
+            # copy spilled entries on disk instead of loading them
+            path = target._new_spill_path()
+            shutil.copyfile(self._spilled[identifier], path)
+            target._identifiers[target_identifier] = None
+            target._spilled[target_identifier] = path
+
+        else:
+            target[target_identifier] = deepcopy(self._resident[identifier], memo)
+
+    def __deepcopy__(self, memo: dict) -> SpillableEntryStore:
+        new_store = SpillableEntryStore(self._memory_budget)
+        memo[id(self)] = new_store
+
+        for identifier in self._identifiers:
+            self._copy_entry_to(identifier, new_store, identifier, memo)
+
+        return new_store
+
+    def _dump_entry(self, identifier: Hashable, save_file: BinaryIO) -> None:
+        if identifier in self._aliases:
+            owner, owner_identifier = self._resolve_alias(identifier)
+            owner._dump_entry(owner_identifier, save_file)
+
+        elif identifier in self._spilled:
+            with open(self._spilled[identifier], "rb") as spill_file:
+                shutil.copyfileobj(spill_file, save_file)
+
+        else:
+            pickle.dump(
+                self._resident[identifier],
+                save_file,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    def dump_entries(self, save_file: BinaryIO) -> None:
+        """
+        Pickle all entries one after another into 'save_file' without
+        materializing the store. Spilled entries are copied from disk as they
+        are, so they are neither loaded nor spilled again.
+
+        Args:
+            save_file (BinaryIO): File opened for binary writing.
+        """
+        for identifier in self._identifiers:
+            self._dump_entry(identifier, save_file)
+
+    def __reduce__(self):
+        # serialized stores are materialized into plain dictionaries, use
+        # 'dump_entries' to serialize large stores
+        return (dict, (dict(self.items()),))
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__} with {len(self)} entries "
+            f"({len(self._spilled)} spilled)"
+        )
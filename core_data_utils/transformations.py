@@ -1,11 +1,62 @@
+import asyncio
 import copy
 import multiprocessing as mp
-from collections.abc import Hashable
-from typing import Any
+from collections import deque
+from collections.abc import Callable, Hashable, Iterable, MutableMapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextvars import ContextVar
+from multiprocessing.pool import AsyncResult, Pool
+from typing import Any, Optional
 
 from tqdm import tqdm
 
-from .datasets import BaseDataSet, BaseDataSetEntry
+from .datasets import BaseDataSet, BaseDataSetEntry, MemoryBudget, SpillableEntryStore
+from .datasets.memory import estimate_size
+
+
+class _ProcessPool:
+    """
+    Process pool used by the coroutines of a running async transformation.
+    With a memory budget, the approximate size of every submitted payload is
+    reserved until its result arrives, and submissions wait until their
+    reservation fits into the budget. At least one task is always in flight.
+    """
+
+    def __init__(
+        self, executor: Executor, memory_budget: Optional[MemoryBudget] = None
+    ) -> None:
+        self._executor = executor
+        self._memory_budget = memory_budget
+        self._condition = asyncio.Condition()
+        self._in_flight: int = 0
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+
+        if self._memory_budget is None:
+            return await loop.run_in_executor(self._executor, func, *args)
+
+        nbytes = estimate_size(args)
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self._in_flight == 0 or self._memory_budget.can_reserve(nbytes)
+            )
+            self._memory_budget.reserve(nbytes)
+            self._in_flight += 1
+
+        try:
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._memory_budget.release(nbytes)
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+
+# process pool available to the coroutines of a running async transformation
+_process_pool: ContextVar[Optional[_ProcessPool]] = ContextVar(
+    "_process_pool", default=None
+)
 
 
 class BaseFilter:
@@ -17,18 +68,24 @@ class BaseFilter:
         pass
 
     def __call__(self, dataset: BaseDataSet) -> BaseDataSet:
-        new_data: dict = {}
-
         dataset = dataset.copy()
 
+        rejected_identifiers: list[Hashable] = []
+
         for idx, c_ds_entry in enumerate(dataset):
 
             c_ds_entry: BaseDataSetEntry = dataset[idx]
 
-            if self._filter_decision_single_entry(
+            if not self._filter_decision_single_entry(
                 idx, c_ds_entry, **self._global_dataset_properties(dataset)
             ):
-                new_data[c_ds_entry.identifier] = c_ds_entry
+                rejected_identifiers.append(c_ds_entry.identifier)
+
+        # filter the (private) copy in place, so entries held by a memory
+        # budget are neither loaded nor tracked a second time
+        new_data: MutableMapping[Hashable, BaseDataSetEntry] = dataset.to_dict()["data"]
+        for identifier in rejected_identifiers:
+            del new_data[identifier]
 
         return self._post_processing(
             dataset_metadata=dataset.metadata, data_dict=new_data
@@ -73,25 +130,60 @@ class BaseMultiDataSetTransformation:
         self,
         cpus: int = 1,
         copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
         **kwargs: dict[str, Any],
     ) -> Any:
 
-        if copy_datasets:
-            kwargs = copy.deepcopy(kwargs)
+        memory_budget, kwargs = self._prepare_inputs(
+            copy_datasets=copy_datasets, memory_budget=memory_budget, **kwargs
+        )
 
         new_dataset_metadata = self._transform_dataset_metadata(**kwargs)
-        new_data_dict = self._transform_entries(cpus=cpus, **kwargs)
+        new_data_dict = self._transform_entries(
+            cpus=cpus, memory_budget=memory_budget, **kwargs
+        )
 
         return self._post_processing(
             dataset_metadata=new_dataset_metadata, data_dict=new_data_dict
         )
 
+    def _prepare_inputs(
+        self,
+        copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs: dict[str, Any],
+    ) -> tuple[Optional[MemoryBudget], dict[str, Any]]:
+
+        if memory_budget is None:
+            # inherit the budget of the input datasets, if any
+            memory_budget = next(
+                (
+                    ds.memory_budget
+                    for ds in kwargs.values()
+                    if ds.memory_budget is not None
+                ),
+                None,
+            )
+
+        if copy_datasets:
+            if memory_budget is None:
+                kwargs = copy.deepcopy(kwargs)
+            else:
+                # copy entry by entry so copies are governed by the budget
+                kwargs = {
+                    dsname: ds.copy(memory_budget=memory_budget)
+                    for dsname, ds in kwargs.items()
+                }
+
+        return memory_budget, kwargs
+
     def _transform_dataset_metadata(self, **kwargs) -> dict:
         return {}
 
     def _transform_entries(
         self,
         cpus: int = 1,
+        memory_budget: Optional[MemoryBudget] = None,
         **kwargs: dict[str, Any],
     ) -> Any:
         """
@@ -100,6 +192,9 @@ class BaseMultiDataSetTransformation:
                 transformation in parallel. Default is '1' (no parallel processing).
             copy_datasets (bool): Whether to create a (deep) copy of the
                 input datasets. Default is 'True'
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the transformed entries. When executing in parallel, the
+                number of tasks in flight is throttled to stay within it.
             **kwargs (dict[str, BaseDataSet]): Iterable of DataSets acting as
                 input data for carrying out the transformation
         Returns:
@@ -112,7 +207,9 @@ class BaseMultiDataSetTransformation:
         if not self._assert_compatability(**kwargs):
             raise RuntimeError("Supplied DataSets are not compatible.")
 
-        new_data_list: list[BaseDataSetEntry] = []
+        new_data_dict: MutableMapping[Hashable, BaseDataSetEntry] = (
+            {} if memory_budget is None else SpillableEntryStore(memory_budget)
+        )
 
         # prepare list of identifiers
         identifiers: list[Hashable] = next(iter(kwargs.values())).keys()
@@ -131,10 +228,11 @@ class BaseMultiDataSetTransformation:
                     ),
                     dataset_properties=dataset_properties,
                 )
-                new_data_list.append(new_ds_entry)
+                new_data_dict[new_ds_entry.identifier] = new_ds_entry
         elif cpus > 1:
-            # create Iterable of "entries" that can be passed to Pool.starmap
-            entries_iterable: list[tuple[BaseDataSetEntry, dict]] = [
+            # create Iterable of "entries" that can be passed to Pool.starmap,
+            # merged lazily so that payloads are only built once they are submitted
+            entries_iterable: Iterable[tuple[BaseDataSetEntry, dict]] = (
                 (
                     self._merge_entries(
                         identifier=identifier,
@@ -146,25 +244,79 @@ class BaseMultiDataSetTransformation:
                     dataset_properties,
                 )
                 for identifier in identifiers
-            ]
+            )
             cmethod = mp.get_start_method()
             if cmethod != "spawn":
                 raise RuntimeError(
                     f"Multiprocessing start method has to be 'spawn', got '{cmethod}' instead."
                 )
             with mp.Pool(cpus) as parpool:
-                new_data_list: list[BaseDataSet] = parpool.starmap(
-                    self._transform_single_entry, entries_iterable
-                )
+                if memory_budget is None:
+                    new_data_list: list[BaseDataSetEntry] = parpool.starmap(
+                        self._transform_single_entry, list(entries_iterable)
+                    )
+                    for nentry in new_data_list:
+                        new_data_dict[nentry.identifier] = nentry
+                else:
+                    self._throttled_starmap(
+                        parpool, entries_iterable, memory_budget, new_data_dict
+                    )
         else:
             raise ValueError(
                 f"Could not interpret provided number of CPU cores to use: got '{cpus}'."
             )
 
-        new_data_dict: dict = {nentry.identifier: nentry for nentry in new_data_list}
-
         return new_data_dict
 
+    def _throttled_starmap(
+        self,
+        parpool: Pool,
+        entries_iterable: Iterable[tuple[BaseDataSetEntry, dict]],
+        memory_budget: MemoryBudget,
+        new_data_dict: MutableMapping[Hashable, BaseDataSetEntry],
+    ) -> None:
+        """
+        Submit entries to 'parpool' one by one, reserving the approximate size
+        of each payload in 'memory_budget'. New tasks are only submitted once
+        the reservation fits into the budget, at least one task is always
+        in flight.
+        """
+        in_flight: deque[tuple[AsyncResult, int]] = deque()
+
+        def collect_oldest() -> None:
+            result, nbytes = in_flight.popleft()
+            try:
+                nentry: BaseDataSetEntry = result.get()
+            finally:
+                memory_budget.release(nbytes)
+            new_data_dict[nentry.identifier] = nentry
+
+        try:
+            for entry, dataset_properties in entries_iterable:
+                nbytes = estimate_size(entry)
+
+                while in_flight and not memory_budget.can_reserve(nbytes):
+                    collect_oldest()
+
+                memory_budget.reserve(nbytes)
+                in_flight.append(
+                    (
+                        parpool.apply_async(
+                            self._transform_single_entry, (entry, dataset_properties)
+                        ),
+                        nbytes,
+                    )
+                )
+
+            while in_flight:
+                collect_oldest()
+        finally:
+            # the budget outlives this transformation, release the reservations
+            # of tasks that are abandoned because of an error
+            while in_flight:
+                _, nbytes = in_flight.popleft()
+                memory_budget.release(nbytes)
+
     def _merge_entries(
         self, identifier: str, **kwargs: dict[str, BaseDataSetEntry]
     ) -> BaseDataSetEntry:
@@ -218,5 +370,234 @@ class BaseDataSetTransformation(BaseMultiDataSetTransformation):
         dataset: BaseDataSet,
         cpus: int = 1,
         copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
+    ) -> Any:
+        return super()._transform(
+            cpus=cpus,
+            copy_datasets=copy_datasets,
+            memory_budget=memory_budget,
+            x=dataset,
+        )
+
+
+def _assert_no_running_event_loop() -> None:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise RuntimeError(
+        "Cannot run transformation synchronously from a running event loop, "
+        "await 'transform_async' instead."
+    )
+
+
+class BaseAsyncMultiDataSetTransformation(BaseMultiDataSetTransformation):
+    """
+    Transformation whose per-entry work is carried out by coroutines running
+    on an event loop, suited for I/O-bound steps. At most 'max_concurrency'
+    entries are transformed concurrently. CPU-bound parts can be offloaded
+    to a process pool of 'cpus' processes with '_run_cpu_bound'.
+
+    Args:
+        max_concurrency (int): Maximum number of entries that are
+            transformed concurrently. Default is '16'.
+    """
+
+    def __init__(self, max_concurrency: int = 16) -> None:
+        if max_concurrency < 1:
+            raise ValueError(
+                f"'max_concurrency' has to be a positive integer >=1, got '{max_concurrency}'"
+            )
+        self._max_concurrency = max_concurrency
+        super().__init__()
+
+    def _transform(
+        self,
+        cpus: int = 1,
+        copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs: dict[str, Any],
+    ) -> Any:
+        _assert_no_running_event_loop()
+        return asyncio.run(
+            self._transform_async(
+                cpus=cpus,
+                copy_datasets=copy_datasets,
+                memory_budget=memory_budget,
+                **kwargs,
+            )
+        )
+
+    async def _transform_async(
+        self,
+        cpus: int = 1,
+        copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs: dict[str, Any],
+    ) -> Any:
+        memory_budget, kwargs = self._prepare_inputs(
+            copy_datasets=copy_datasets, memory_budget=memory_budget, **kwargs
+        )
+
+        new_dataset_metadata = self._transform_dataset_metadata(**kwargs)
+        new_data_dict = await self._transform_entries_async(
+            cpus=cpus, memory_budget=memory_budget, **kwargs
+        )
+
+        return self._post_processing(
+            dataset_metadata=new_dataset_metadata, data_dict=new_data_dict
+        )
+
+    async def _transform_entries_async(
+        self,
+        cpus: int = 1,
+        memory_budget: Optional[MemoryBudget] = None,
+        **kwargs: dict[str, Any],
+    ) -> MutableMapping[Hashable, BaseDataSetEntry]:
+        """
+        Args:
+            cpus (int): Size of the process pool available to
+                '_run_cpu_bound'. Default is '1' (no process pool).
+            memory_budget (MemoryBudget, optional): Memory budget governing
+                the transformed entries and the payloads submitted to the
+                process pool.
+            **kwargs (dict[str, BaseDataSet]): Iterable of DataSets acting as
+                input data for carrying out the transformation
+        Returns:
+            (MutableMapping): Transformed entries
+        """
+
+        if len(kwargs) == 0:
+            raise ValueError("Length of supplied 'datasets' iterable was 0.")
+
+        if not self._assert_compatability(**kwargs):
+            raise RuntimeError("Supplied DataSets are not compatible.")
+
+        if cpus < 1:
+            raise ValueError(
+                f"Could not interpret provided number of CPU cores to use: got '{cpus}'."
+            )
+
+        if cpus > 1:
+            cmethod = mp.get_start_method()
+            if cmethod != "spawn":
+                raise RuntimeError(
+                    f"Multiprocessing start method has to be 'spawn', got '{cmethod}' instead."
+                )
+
+        new_data_dict: MutableMapping[Hashable, BaseDataSetEntry] = (
+            {} if memory_budget is None else SpillableEntryStore(memory_budget)
+        )
+
+        # prepare iterator of identifiers shared by all workers
+        identifiers: list[Hashable] = next(iter(kwargs.values())).keys()
+        identifier_iterator = iter(identifiers)
+
+        dataset_properties = {dsname: ds.metadata for dsname, ds in kwargs.items()}
+
+        async def worker(pbar: tqdm) -> None:
+            for identifier in identifier_iterator:
+                new_ds_entry: BaseDataSetEntry = (
+                    await self._transform_single_entry_async(
+                        self._merge_entries(
+                            identifier=identifier,
+                            **{
+                                dsname: ds.get_with_identifier(identifier)
+                                for dsname, ds in kwargs.items()
+                            },
+                        ),
+                        dataset_properties=dataset_properties,
+                    )
+                )
+                new_data_dict[new_ds_entry.identifier] = new_ds_entry
+                pbar.update()
+
+        executor: Optional[Executor] = (
+            ProcessPoolExecutor(cpus, mp_context=mp.get_context()) if cpus > 1 else None
+        )
+        token = _process_pool.set(
+            None if executor is None else _ProcessPool(executor, memory_budget)
+        )
+        try:
+            with tqdm(total=len(identifiers)) as pbar:
+                workers = [
+                    asyncio.ensure_future(worker(pbar))
+                    for _ in range(self._max_concurrency)
+                ]
+                try:
+                    await asyncio.gather(*workers)
+                except BaseException:
+                    # stop the remaining workers before propagating the error
+                    for task in workers:
+                        task.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    if executor is not None:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+        finally:
+            _process_pool.reset(token)
+
+        if executor is not None:
+            # shutting down waits for the worker processes, keep the loop free
+            await asyncio.to_thread(executor.shutdown)
+
+        return new_data_dict
+
+    async def _run_cpu_bound(self, func: Callable, *args: Any) -> Any:
+        """
+        Run CPU-bound 'func' in the process pool without blocking the event
+        loop. 'func' and its arguments have to be picklable. Without a
+        process pool ('cpus=1'), 'func' is called directly. With a memory
+        budget, the size of the arguments is reserved while 'func' runs.
+        """
+        process_pool = _process_pool.get()
+        if process_pool is None:
+            return func(*args)
+        return await process_pool.run(func, *args)
+
+    async def _transform_single_entry_async(
+        self, entry: BaseDataSetEntry, dataset_properties: dict
+    ) -> BaseDataSetEntry:
+        return await self._run_cpu_bound(
+            self._transform_single_entry, entry, dataset_properties
+        )
+
+
+class BaseAsyncDataSetTransformation(
+    BaseAsyncMultiDataSetTransformation, BaseDataSetTransformation
+):
+
+    def __call__(
+        self,
+        dataset: BaseDataSet,
+        cpus: int = 1,
+        copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
     ) -> Any:
-        return super()._transform(cpus=cpus, copy_datasets=copy_datasets, x=dataset)
+        _assert_no_running_event_loop()
+        return asyncio.run(
+            self.transform_async(
+                dataset,
+                cpus=cpus,
+                copy_datasets=copy_datasets,
+                memory_budget=memory_budget,
+            )
+        )
+
+    async def transform_async(
+        self,
+        dataset: BaseDataSet,
+        cpus: int = 1,
+        copy_datasets: bool = True,
+        memory_budget: Optional[MemoryBudget] = None,
+    ) -> Any:
+        """
+        Coroutine variant of calling the transformation, for use from code
+        that is already running an event loop.
+        """
+        return await self._transform_async(
+            cpus=cpus,
+            copy_datasets=copy_datasets,
+            memory_budget=memory_budget,
+            x=dataset,
+        )
@@ -0,0 +1,11 @@
+from core_data_utils.datasets import BaseDataSetEntry
+from core_data_utils.transformations import BaseDataSetTransformation
+
+
+class MeanIntensityTransformation(BaseDataSetTransformation):
+    def _transform_single_entry(
+        self, entry: BaseDataSetEntry, dataset_properties: dict
+    ) -> BaseDataSetEntry:
+        return BaseDataSetEntry(
+            entry.identifier, data=float(entry.data.mean()), metadata=entry.metadata
+        )
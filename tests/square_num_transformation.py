@@ -1,7 +1,9 @@
+import asyncio
 from typing import Any
 
 from core_data_utils.datasets import BaseDataSet, BaseDataSetEntry
 from core_data_utils.transformations import (
+    BaseAsyncDataSetTransformation,
     BaseDataSetTransformation,
     BaseMultiDataSetTransformation,
 )
@@ -14,3 +16,49 @@ class SquareNumTransformation(BaseDataSetTransformation):
         num = entry.data
 
         return BaseDataSetEntry(entry.identifier, data=num**2, metadata=entry.metadata)
+
+
+class FailingSquareNumTransformation(SquareNumTransformation):
+    def _transform_single_entry(
+        self, entry: BaseDataSetEntry, dataset_properties: dict
+    ) -> BaseDataSetEntry:
+        if entry.identifier == 5:
+            raise ValueError("failing on purpose")
+        return super()._transform_single_entry(entry, dataset_properties)
+
+
+class AsyncSquareNumTransformation(BaseAsyncDataSetTransformation):
+    def _setup(self) -> None:
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    @staticmethod
+    def _square(num: int) -> int:
+        return num**2
+
+    async def _transform_single_entry_async(
+        self, entry: BaseDataSetEntry, dataset_properties: dict
+    ) -> BaseDataSetEntry:
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        await asyncio.sleep(0.01)
+        self.concurrent -= 1
+
+        num = await self._run_cpu_bound(self._square, entry.data)
+
+        return BaseDataSetEntry(entry.identifier, data=num, metadata=entry.metadata)
+
+
+class FailingAsyncSquareNumTransformation(AsyncSquareNumTransformation):
+    def _setup(self) -> None:
+        super()._setup()
+        self.started = 0
+
+    async def _transform_single_entry_async(
+        self, entry: BaseDataSetEntry, dataset_properties: dict
+    ) -> BaseDataSetEntry:
+        self.started += 1
+        if entry.identifier == 1:
+            await asyncio.sleep(0.05)
+            raise ValueError("failing on purpose")
+        return await super()._transform_single_entry_async(entry, dataset_properties)
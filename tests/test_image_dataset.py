@@ -0,0 +1,163 @@
+import asyncio
+import multiprocessing as mp
+import os
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from core_data_utils.datasets.image import ImageDataset
+
+from .mean_intensity_transformation import MeanIntensityTransformation
+
+mp.set_start_method("spawn", force=True)
+
+NUM_FRAMES = 40
+NUM_PAGES = 6
+
+
+def frame_value(index: int) -> int:
+    return 6 * index
+
+
+def write_video(fpath: str, values: list[int]) -> None:
+    # lossless codec, so pixel values can be compared exactly
+    writer = cv2.VideoWriter(fpath, cv2.VideoWriter_fourcc(*"FFV1"), 10, (32, 24))
+    for value in values:
+        writer.write(np.full((24, 32, 3), value, dtype=np.uint8))
+    writer.release()
+
+
+@pytest.fixture(scope="module")
+def video_path() -> str:
+    os.makedirs("/tmp/pytest", exist_ok=True)
+    fpath = "/tmp/pytest/test_video.avi"
+
+    write_video(fpath, [frame_value(index) for index in range(NUM_FRAMES)])
+
+    return fpath
+
+
+@pytest.fixture(scope="module")
+def stack_path() -> str:
+    os.makedirs("/tmp/pytest", exist_ok=True)
+    fpath = "/tmp/pytest/test_stack.tiff"
+
+    cv2.imwritemulti(
+        fpath,
+        [
+            np.full((8, 8), frame_value(index), dtype=np.uint8)
+            for index in range(NUM_PAGES)
+        ],
+    )
+
+    return fpath
+
+
+def test_video_identifiers(video_path):
+    vds = ImageDataset.from_video(video_path)
+
+    assert vds.keys() == list(range(NUM_FRAMES))
+    assert vds.metadata["source"] == video_path
+
+    strided_vds = ImageDataset.from_video(video_path, start=2, stop=20, step=3)
+
+    assert strided_vds.keys() == [2, 5, 8, 11, 14, 17]
+
+    # 'stop' is clipped to the number of frames
+    assert ImageDataset.from_video(video_path, start=35, stop=100).keys() == list(
+        range(35, NUM_FRAMES)
+    )
+
+
+def test_video_frame_content(video_path):
+    vds = ImageDataset.from_video(video_path, step=3)
+
+    # sequential (strided) access
+    for entry in vds:
+        assert entry.data.shape == (24, 32, 3)
+        assert np.all(entry.data == frame_value(entry.identifier))
+
+    # reverse access
+    for index in reversed(range(len(vds))):
+        entry = vds[index]
+        assert np.all(entry.data == frame_value(entry.identifier))
+
+    # forward access with a gap that requires seeking
+    assert np.all(vds[0].data == frame_value(0))
+    assert np.all(vds[len(vds) - 1].data == frame_value(vds[len(vds) - 1].identifier))
+
+
+def test_multipage(stack_path):
+    sds = ImageDataset.from_multipage(stack_path, start=1, step=2)
+
+    assert sds.keys() == [1, 3, 5]
+
+    for entry in sds:
+        assert entry.data.shape == (8, 8, 3)
+        assert np.all(entry.data == frame_value(entry.identifier))
+
+    for index in reversed(range(len(sds))):
+        entry = sds[index]
+        assert np.all(entry.data == frame_value(entry.identifier))
+
+
+def test_invalid_frame_range(video_path, stack_path):
+    with pytest.raises(ValueError):
+        _ = ImageDataset.from_video(video_path, start=10, stop=10)
+
+    with pytest.raises(ValueError):
+        _ = ImageDataset.from_video(video_path, start=NUM_FRAMES)
+
+    with pytest.raises(ValueError):
+        _ = ImageDataset.from_multipage(stack_path, start=4, stop=2)
+
+
+def test_lazy_entries_copy_and_transformation(video_path, stack_path):
+    for ids in (
+        ImageDataset.from_video(video_path, step=4),
+        ImageDataset.from_multipage(stack_path),
+    ):
+        copied_ids = ids.copy()
+
+        for index in range(len(ids)):
+            assert np.array_equal(copied_ids[index].data, ids[index].data)
+
+        mit = MeanIntensityTransformation()
+        serial_ds = mit(ids)
+        parallel_ds = mit(ids, cpus=2)
+
+        for index in range(len(ids)):
+            assert serial_ds[index].data == frame_value(ids[index].identifier)
+            assert parallel_ds[index].data == serial_ds[index].data
+
+
+def test_rewritten_video():
+    os.makedirs("/tmp/pytest", exist_ok=True)
+    fpath = "/tmp/pytest/test_rewritten_video.avi"
+
+    write_video(fpath, [50] * 10)
+    vds = ImageDataset.from_video(fpath)
+
+    assert len(vds) == 10
+    assert np.all(vds[0].data == 50)
+
+    write_video(fpath, [100] * 20)
+    vds = ImageDataset.from_video(fpath)
+
+    assert len(vds) == 20
+    assert np.all(vds[0].data == 100)
+    assert np.all(vds[15].data == 100)
+
+
+def test_threaded_decoding(video_path):
+    vds = ImageDataset.from_video(video_path)
+
+    async def decode_all() -> list:
+        return await asyncio.gather(
+            *(asyncio.to_thread(lambda entry=entry: entry.data) for entry in vds)
+        )
+
+    for entry, frame in zip(vds, asyncio.run(decode_all())):
+        assert np.all(frame == frame_value(entry.identifier))
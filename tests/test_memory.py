@@ -0,0 +1,236 @@
+import gc
+import multiprocessing as mp
+import os
+
+import pytest
+
+from core_data_utils.datasets import (
+    BaseDataSet,
+    BaseDataSetEntry,
+    MemoryBudget,
+    SpillableEntryStore,
+)
+from core_data_utils.datasets.memory import estimate_size
+from core_data_utils.transformations import BaseFilter
+
+from .square_num_transformation import (
+    FailingSquareNumTransformation,
+    SquareNumTransformation,
+)
+
+mp.set_start_method("spawn", force=True)
+
+
+def test_spilling_and_loading():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(20)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+
+    assert isinstance(sds._data, SpillableEntryStore)
+    assert budget.resident_bytes <= budget.max_bytes
+    assert any(sds._data.is_spilled(i) for i in range(20))
+
+    for idx, entry in enumerate(sds):
+        assert entry.identifier == idx
+        assert entry.data == example_data[idx]
+        assert budget.resident_bytes <= budget.max_bytes
+
+
+def test_budgeted_dataset_copying():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(20)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+    copied_ds = sds.copy()
+
+    assert copied_ds.memory_budget is budget
+
+    _ = sds._data.pop(1)
+
+    assert 1 not in sds._data
+    assert 1 in copied_ds._data
+
+    for idx, entry in enumerate(copied_ds):
+        assert entry.data == example_data[idx]
+
+
+def test_budgeted_saving_loading():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(20)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+
+    num_spilled = sum(sds._data.is_spilled(i) for i in range(20))
+    sds.to_pickle("/tmp/pytest/test_budget.pickle", mkdir=True)
+
+    # streaming entries neither loads nor re-spills them
+    assert sum(sds._data.is_spilled(i) for i in range(20)) == num_spilled
+    assert budget.resident_bytes <= budget.max_bytes
+
+    lds = BaseDataSet.from_pickle("/tmp/pytest/test_budget.pickle")
+
+    assert lds.memory_budget is None
+    assert len(lds) == 20
+
+    for idx, entry in enumerate(lds):
+        assert entry.data == example_data[idx]
+
+    budgeted_lds = BaseDataSet.from_pickle(
+        "/tmp/pytest/test_budget.pickle", memory_budget=budget
+    )
+
+    assert isinstance(budgeted_lds._data, SpillableEntryStore)
+    assert budget.resident_bytes <= budget.max_bytes
+
+    for idx, entry in enumerate(budgeted_lds):
+        assert entry.data == example_data[idx]
+
+
+def test_budgeted_transformation():
+    st = SquareNumTransformation()
+
+    example_data = {i: 2 * i for i in range(20)}
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    budget = MemoryBudget(max_bytes=1_000)
+
+    unbudgeted_ds = st(dataset=ods)
+    serial_ds = st(dataset=ods, memory_budget=budget)
+    parallel_ds = st(dataset=ods, cpus=2, memory_budget=budget)
+
+    assert serial_ds.memory_budget is budget
+    assert parallel_ds.memory_budget is budget
+    assert budget.reserved_bytes == 0
+
+    for index in range(len(unbudgeted_ds)):
+        assert unbudgeted_ds[index].identifier == serial_ds[index].identifier
+        assert unbudgeted_ds[index].data == serial_ds[index].data
+        assert unbudgeted_ds[index].identifier == parallel_ds[index].identifier
+        assert unbudgeted_ds[index].data == parallel_ds[index].data
+
+
+def test_reservations_released_on_error():
+    ft = FailingSquareNumTransformation()
+
+    example_data = {i: 2 * i for i in range(20)}
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    budget = MemoryBudget(max_bytes=1_000)
+
+    with pytest.raises(ValueError):
+        _ = ft(dataset=ods, cpus=2, memory_budget=budget)
+
+    assert budget.reserved_bytes == 0
+
+
+def test_copying_into_budget():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(20)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data)
+    copied_ds = sds.copy(memory_budget=budget)
+
+    assert copied_ds.memory_budget is budget
+    assert isinstance(copied_ds._data, SpillableEntryStore)
+    assert budget.resident_bytes <= budget.max_bytes
+
+    for idx, entry in enumerate(copied_ds):
+        assert entry.data == example_data[idx]
+        assert entry is not sds[idx]
+
+
+class EvenIdentifierFilter(BaseFilter):
+    def _filter_decision_single_entry(
+        self, index: int, ds_entry: BaseDataSetEntry, **kwargs
+    ) -> bool:
+        return ds_entry.identifier % 2 == 0
+
+
+def test_budgeted_slicing():
+    budget = MemoryBudget(max_bytes=20_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(10)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+    resident_bytes = budget.resident_bytes
+
+    sliced_ds = sds[2:8]
+
+    # entries shared with 'sds' are not accounted for twice
+    assert budget.resident_bytes == resident_bytes
+    assert sliced_ds[0] is sds[2]
+
+    # force spilling of all but one entry and load them again
+    _ = BaseDataSet.from_flat_dicts({"large": bytes(19_000)}, memory_budget=budget)
+    assert sliced_ds._data.is_spilled(3)
+    assert sliced_ds[1] is sds[3]
+
+    # removing entries from 'sds' does not affect the slice
+    for identifier in sds.keys():
+        del sds._data[identifier]
+
+    for idx, entry in enumerate(sliced_ds):
+        assert entry.data == example_data[idx + 2]
+
+
+def test_budgeted_filter():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(20)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+    filtered_ds = EvenIdentifierFilter()(sds)
+
+    assert filtered_ds.memory_budget is budget
+    assert filtered_ds.keys() == list(range(0, 20, 2))
+    assert budget.resident_bytes <= budget.max_bytes
+
+    for entry in filtered_ds:
+        assert entry.data == example_data[entry.identifier]
+
+
+class Node:
+    def __init__(self, child=None) -> None:
+        self.child = child
+
+
+def test_estimate_size_deeply_nested():
+    node = None
+    for _ in range(10_000):
+        node = Node(node)
+
+    assert estimate_size(node) > 10_000
+
+    budget = MemoryBudget(max_bytes=10_000_000)
+    sds = BaseDataSet.from_flat_dicts({0: node}, memory_budget=budget)
+
+    assert budget.resident_bytes > 10_000
+    assert sds[0].data is node
+
+
+def count_spill_files(budget: MemoryBudget) -> int:
+    return sum(len(files) for _, _, files in os.walk(budget.spill_directory))
+
+
+def test_slice_outlives_parent():
+    budget = MemoryBudget(max_bytes=5_000)
+    example_data = {i: bytes([i]) * 1_000 for i in range(50)}
+
+    sds = BaseDataSet.from_flat_dicts(example_data, memory_budget=budget)
+    sliced_ds = sds[0:2]
+
+    assert count_spill_files(budget) > 2
+
+    del sds
+    gc.collect()
+
+    # only the entries of the slice are kept
+    assert count_spill_files(budget) + len(budget._resident) == 2
+    assert budget.resident_bytes <= 2 * estimate_size(sliced_ds[0])
+
+    for idx, entry in enumerate(sliced_ds):
+        assert entry.data == example_data[idx]
+
+    # entries were handed over to the slice and can be spilled again
+    _ = BaseDataSet.from_flat_dicts({"large": bytes(4_500)}, memory_budget=budget)
+    assert sliced_ds._data.is_spilled(0)
+    assert sliced_ds[0].data == example_data[0]
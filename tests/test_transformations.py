@@ -1,13 +1,20 @@
+import asyncio
 import multiprocessing as mp
 from typing import Any
 
-from core_data_utils.datasets import BaseDataSet, BaseDataSetEntry
+import pytest
+
+from core_data_utils.datasets import BaseDataSet, BaseDataSetEntry, MemoryBudget
 from core_data_utils.transformations import (
     BaseDataSetTransformation,
     BaseMultiDataSetTransformation,
 )
 
-from .square_num_transformation import SquareNumTransformation
+from .square_num_transformation import (
+    AsyncSquareNumTransformation,
+    FailingAsyncSquareNumTransformation,
+    SquareNumTransformation,
+)
 
 mp.set_start_method("spawn", force=True)
 
@@ -27,3 +34,106 @@ def test_serial_parallel():
     for index in range(len(serial_ds)):
         assert serial_ds[index].identifier == parallel_ds[index].identifier
         assert serial_ds[index].data == parallel_ds[index].data
+
+
+def test_async_transformation():
+    st = SquareNumTransformation()
+    ast = AsyncSquareNumTransformation(max_concurrency=4)
+
+    example_data = {i: 2 * i for i in range(20)}
+
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    serial_ds = st(dataset=ods)
+    async_ds = ast(dataset=ods)
+
+    assert ast.max_concurrent == 4
+
+    async_parallel_ds = ast(dataset=ods, cpus=2)
+
+    assert serial_ds._data_identifiers == async_ds._data_identifiers
+    assert serial_ds._data_identifiers == async_parallel_ds._data_identifiers
+
+    for index in range(len(serial_ds)):
+        assert serial_ds[index].data == async_ds[index].data
+        assert serial_ds[index].data == async_parallel_ds[index].data
+
+
+def test_async_transformation_in_running_loop():
+    st = SquareNumTransformation()
+    ast = AsyncSquareNumTransformation(max_concurrency=4)
+
+    example_data = {i: 2 * i for i in range(20)}
+
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    serial_ds = st(dataset=ods)
+
+    async def run_transformation() -> BaseDataSet:
+        # calling the transformation synchronously is not possible here
+        with pytest.raises(RuntimeError):
+            _ = ast(dataset=ods)
+        return await ast.transform_async(ods, cpus=2)
+
+    async_ds = asyncio.run(run_transformation())
+
+    assert serial_ds._data_identifiers == async_ds._data_identifiers
+
+    for index in range(len(serial_ds)):
+        assert serial_ds[index].data == async_ds[index].data
+
+
+def test_async_transformation_budget():
+    ast = AsyncSquareNumTransformation(max_concurrency=8)
+
+    example_data = {i: 2 * i for i in range(20)}
+
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    # fits the payloads of only a few entries at a time
+    budget = MemoryBudget(max_bytes=200)
+
+    async def run_transformation() -> tuple[BaseDataSet, int]:
+        max_reserved_bytes = 0
+        transformation = asyncio.ensure_future(
+            ast.transform_async(ods, cpus=2, memory_budget=budget)
+        )
+        while not transformation.done():
+            max_reserved_bytes = max(max_reserved_bytes, budget.reserved_bytes)
+            await asyncio.sleep(0.001)
+        return await transformation, max_reserved_bytes
+
+    async_ds, max_reserved_bytes = asyncio.run(run_transformation())
+
+    assert 0 < max_reserved_bytes <= budget.max_bytes
+    assert budget.reserved_bytes == 0
+    assert async_ds.memory_budget is budget
+
+    for index in range(len(async_ds)):
+        assert async_ds[index].data == (2 * index) ** 2
+
+
+@pytest.mark.parametrize("cpus", [1, 2])
+def test_async_transformation_error(cpus):
+    fast = FailingAsyncSquareNumTransformation(max_concurrency=4)
+
+    example_data = {i: 2 * i for i in range(40)}
+
+    ods = BaseDataSet.from_flat_dicts(example_data)
+
+    budget = MemoryBudget(max_bytes=200)
+
+    async def run_transformation() -> int:
+        with pytest.raises(ValueError):
+            _ = await fast.transform_async(ods, cpus=cpus, memory_budget=budget)
+
+        started = fast.started
+        # give orphaned workers the chance to continue
+        await asyncio.sleep(0.3)
+        return started
+
+    started = asyncio.run(run_transformation())
+
+    assert fast.started == started
+    assert started < 40
+    assert budget.reserved_bytes == 0